@@ -2,7 +2,6 @@ import pathlib
 import tempfile
 import shutil
 import re
-from distutils import dir_util
 
 import click
 from colored import attr, fg
@@ -128,7 +127,7 @@ def new_project(project_name, base_path):
         return project_module, project_name
     except:
         try:
-            dir_util.remove_tree(tmpdir)
+            shutil.rmtree(tmpdir, ignore_errors=True)
         except:
             pass  # safe to ignore
 
@@ -1,52 +1,89 @@
 import os
+import hashlib
+import functools
 import tarfile
+import shutil
 import tempfile
 import logging
+import time
 import importlib
-from distutils import dir_util
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import json
 
+import joblib
 import yaml
 import ulid
 
+from h1st.model_repository.storage.base import walk_files
 from h1st.model_repository.storage.s3 import S3Storage
 from h1st.model_repository.storage.local import LocalStorage
 
 SEP = "::"
 logger = logging.getLogger(__name__)
 
+# local folder keeping the downloaded files of loaded model versions
+CACHE_ROOT = os.environ.get('H1ST_CACHE_DIR', os.path.expanduser('~/.cache/h1st'))
+# least recently loaded versions are removed from the cache folder beyond this count
+CACHE_MAX_VERSIONS = int(os.environ.get('H1ST_CACHE_MAX_VERSIONS', '32'))
+# versions loaded by any process within this many seconds are never removed
+CACHE_EVICT_AFTER = int(os.environ.get('H1ST_CACHE_EVICT_AFTER', str(24 * 3600)))
+
+# prefer the libyaml-backed implementation when PyYAML was built with it
+Loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
 
 class ModelSerDe:
     STATS_PATH = 'stats.joblib'
     METRICS_PATH = 'metrics.joblib'
-    METAINFO_FILE = 'METAINFO.yaml'
+    METAINFO_FILE = 'METAINFO.json'
+    LEGACY_METAINFO_FILE = 'METAINFO.yaml'  # written by older releases
+    # files are stored as-is by the repository, this is the only compression pass
+    JOBLIB_COMPRESS = 0
+    # numpy arrays of uncompressed dumps are mapped from the page cache instead of
+    # being copied, copy-on-write keeps them writable for further training
+    JOBLIB_MMAP_MODE = 'c'
 
     def _serialize_dict(self, d, path, dict_file):
-        import joblib
-        joblib.dump(d, path + '/%s' % dict_file)
+        joblib.dump(d, path + '/%s' % dict_file, compress=self.JOBLIB_COMPRESS)
 
     def _deserialize_dict(self, path, dict_file):
-        import joblib
-        return joblib.load(path + '/%s' % dict_file)
+        return joblib.load(path + '/%s' % dict_file, mmap_mode=self.JOBLIB_MMAP_MODE)
 
     def _get_model_type(self, model):
-        import tensorflow
-        import sklearn
+        if model is None:
+            return 'custom'
 
-        if isinstance(model, sklearn.base.BaseEstimator):
+        # look at the defining module first, importing tensorflow takes seconds
+        module = type(model).__module__
+        if module.startswith(('sklearn.', 'xgboost.')):
             return 'sklearn'
-        if isinstance(model, tensorflow.keras.Model):
+        if module.startswith(('tensorflow.', 'keras.')):
             return 'tensorflow-keras'
-        if model is None:
-            return 'custom'
+
+        # user-defined subclasses, only now pay for the framework imports
+        try:
+            import sklearn.base
+            if isinstance(model, sklearn.base.BaseEstimator):
+                return 'sklearn'
+        except ImportError:
+            pass
+
+        try:
+            import tensorflow
+            if isinstance(model, tensorflow.keras.Model):
+                return 'tensorflow-keras'
+        except ImportError:
+            pass
 
     def _serialize_single_model(self, model, path, model_name='model'):
         model_type = self._get_model_type(model)
 
         if model_type == 'sklearn':
             # This is a sklearn model
-            import joblib
             model_path = '%s.joblib' % model_name
-            joblib.dump(model, path + '/%s' % model_path)
+            joblib.dump(model, path + '/%s' % model_path, compress=self.JOBLIB_COMPRESS)
         elif model_type == 'tensorflow-keras':
             model_path = model_name
             os.makedirs(path + '/%s' % model_path, exist_ok=True)
@@ -61,8 +98,7 @@ class ModelSerDe:
     def _deserialize_single_model(self, model, path, model_type, model_path):
         if model_type == 'sklearn':
             # This is a sklearn model
-            import joblib
-            model = joblib.load(path + '/%s' % model_path)
+            model = joblib.load(path + '/%s' % model_path, mmap_mode=self.JOBLIB_MMAP_MODE)
             # print(str(type(model)))
         elif model_type == 'tensorflow-keras':
             model.load_weights(path + '/%s/weights' % model_path).expect_partial()
@@ -71,6 +107,17 @@ class ModelSerDe:
 
         return model
 
+    def _map_models(self, func, items):
+        """
+        Apply func to every item of a model collection, concurrently when there
+        are several. Pickling and weight file I/O release the GIL for the most part.
+        """
+        if len(items) <= 1:
+            return [func(item) for item in items]
+
+        with ThreadPoolExecutor(max_workers=min(len(items), os.cpu_count() or 1)) as executor:
+            return list(executor.map(func, items))
+
     def serialize(self, model, path):
         """
         Serialize a H1ST model's model property to disk.
@@ -92,16 +139,27 @@ class ModelSerDe:
 
         if hasattr(model, 'model'):
             logger.info('Saving model property...')
-            if type(model.model) == list:
-                meta_info['models'] = []
-                for i, model in enumerate(model.model):
-                    model_type, model_path = self._serialize_single_model(model, path, 'model_%d' % i)
-                    meta_info['models'].append({'model_type': model_type, 'model_path': model_path})
-            elif type(model.model) == dict:
+            if isinstance(model.model, (list, tuple)):
+                results = self._map_models(
+                    lambda item: self._serialize_single_model(item[1], path, 'model_%d' % item[0]),
+                    list(enumerate(model.model)),
+                )
+                meta_info['models'] = [
+                    {'model_type': model_type, 'model_path': model_path}
+                    for model_type, model_path in results
+                ]
+            elif isinstance(model.model, dict):
+                results = self._map_models(
+                    lambda item: self._serialize_single_model(item[1], path, 'model_%s' % item[0]),
+                    list(model.model.items()),
+                )
                 meta_info['models'] = {}
-                for k, model in model.model.items():
-                    model_type, model_path = self._serialize_single_model(model, path, 'model_%s' % k)
-                    meta_info['models'][k] = {'model_type': model_type, 'model_path': model_path}
+                for k, (model_type, model_path) in zip(model.model.keys(), results):
+                    model_info = {'model_type': model_type, 'model_path': model_path}
+                    if not isinstance(k, str):
+                        # JSON object keys are strings, keep the original key (e.g. int) aside
+                        model_info['key'] = k
+                    meta_info['models'][str(k)] = model_info
             else:
                 # this is a single model
                 model_type, model_path = self._serialize_single_model(model.model, path)
@@ -112,7 +170,7 @@ class ModelSerDe:
             logger.info('Make sure you store stastistic in stats property, models in model property and model metrics in metrics one.')
 
         with open(os.path.join(path, self.METAINFO_FILE), 'w') as file:
-            yaml.dump(meta_info, file)
+            json.dump(meta_info, file)
 
     def deserialize(self, model, path):
         """
@@ -122,8 +180,13 @@ class ModelSerDe:
         :param path: path to model folder
         """
         # Read METAINFO
-        with open(os.path.join(path, self.METAINFO_FILE), 'r') as file:
-            meta_info = yaml.load(file, Loader=yaml.Loader)
+        if os.path.exists(os.path.join(path, self.METAINFO_FILE)):
+            with open(os.path.join(path, self.METAINFO_FILE), 'r') as file:
+                meta_info = json.load(file)
+        else:
+            # binary stream, libyaml decodes it without a python-side text layer
+            with open(os.path.join(path, self.LEGACY_METAINFO_FILE), 'rb') as file:
+                meta_info = yaml.load(file, Loader=Loader)
 
         if 'metrics' in meta_info.keys():
             model.metrics = self._deserialize_dict(path, self.METRICS_PATH)
@@ -134,7 +197,7 @@ class ModelSerDe:
         if 'models' in meta_info.keys():
             model_infos = meta_info['models']
             org_model = getattr(model, 'model', None)  # original model object from Model class
-            if type(model_infos) == list:
+            if isinstance(model_infos, list):
                 if len(model_infos) == 1:
                     # Single model
                     model_info = model_infos[0]
@@ -144,21 +207,25 @@ class ModelSerDe:
                     model.model = self._deserialize_single_model(org_model, path, model_type, model_path)
                 else:
                     # A list of models
-                    model.model = []
                     org_model = org_model or [None for _ in range(len(model_infos))]
-                    for i, model_info in enumerate(model_infos):
-                        model_type = model_info['model_type']
-                        model_path = model_info['model_path']
-                        model.model.append(self._deserialize_single_model(org_model[i], path, model_type, model_path))
-
-            elif type(model_infos) == dict:
+                    model.model = self._map_models(
+                        lambda item: self._deserialize_single_model(
+                            org_model[item[0]], path, item[1]['model_type'], item[1]['model_path']
+                        ),
+                        list(enumerate(model_infos)),
+                    )
+
+            elif isinstance(model_infos, dict):
                 # A dict of models
-                model.model = {}
-                org_model = org_model or {k: None for k in model_infos.keys()}
-                for model_name, model_info in model_infos.items():
-                    model_type = model_info['model_type']
-                    model_path = model_info['model_path']
-                    model.model[model_name] = self._deserialize_single_model(org_model[model_name], path, model_type, model_path)
+                model_keys = [model_info.get('key', k) for k, model_info in model_infos.items()]
+                org_model = org_model or {k: None for k in model_keys}
+                results = self._map_models(
+                    lambda item: self._deserialize_single_model(
+                        org_model[item[0]], path, item[1]['model_type'], item[1]['model_path']
+                    ),
+                    list(zip(model_keys, model_infos.values())),
+                )
+                model.model = dict(zip(model_keys, results))
             else:
                 raise ValueError('Not a valid H1ST Model METAINFO file!')
 
@@ -168,15 +235,39 @@ class ModelRepository:
     Model repository allows user to persist and load model to different storage system.
 
     Model repository uses ``ModelSerDer`` to serialize a model into a temporary folder
-    and then create a tar archive to store on storage. For loading, the repo retrieve
-    the tar archive from the storage and then extract to temporary folder for restoring
-    the model object.
+    and then stores the files of that folder by content (SHA-256), so that files which
+    did not change between versions are not uploaded again. Each version is a small
+    manifest mapping file paths to contents. For loading, the repo downloads the files
+    to a local cache folder for restoring the model object (``~/.cache/h1st`` unless
+    ``H1ST_CACHE_DIR`` is set), which is reused when the same version is loaded again.
+    When a new version is downloaded, older versions beyond the ``H1ST_CACHE_MAX_VERSIONS``
+    (default 32) most recently loaded ones are removed from that folder. Versions loaded
+    by the current process, which may still read their files (tensorflow loads weights
+    lazily), are never removed. Neither are versions loaded by any process within the
+    last ``H1ST_CACHE_EVICT_AFTER`` seconds (default one day). Processes sharing the
+    folder and keeping a version loaded longer than that without loading it again should
+    raise this delay or use their own ``H1ST_CACHE_DIR``.
+    Versions stored as a tar archive by older releases can still be loaded.
     """
 
     _NAMESPACE = "_models"
 
     _DEFAULT_STORAGE = S3Storage
 
+    # model files are stored once per content, under "<namespace>::cas::<sha256>"
+    _CAS = "cas"
+    _MANIFEST = "MANIFEST.json"
+    _TRANSFER_WORKERS = 16
+
+    # in-process LRU cache of the model objects restored by shared loads, for all repositories
+    _CACHE = OrderedDict()
+    _CACHE_LOCK = threading.Lock()
+    _CACHE_MAX_ENTRIES = 32
+    _CACHE_ATTRS = ('metrics', 'stats', 'model')
+    _CACHE_SENTINEL = '.done'
+    # cache folders loaded by this process, never evicted
+    _LOADED_CACHE_DIRS = set()
+
     def __init__(self, storage=None):
         if isinstance(storage, str) and "s3://" in storage:
             storage = storage.replace("s3://", "").strip("/") + "/"
@@ -201,109 +292,290 @@ class ModelRepository:
         # assert isinstance(model, Model)
         # TODO: use version format: v_20200714-1203
         version = version or str(ulid.new())
+        self.invalidate(model, version)
 
+        tmpdir = tempfile.mkdtemp()
         try:
-            tmpdir = tempfile.mkdtemp()
-            with tempfile.NamedTemporaryFile() as f:
-
-                self._serder.serialize(model, tmpdir)
-                _tar_create(f.name, tmpdir)
-                f.flush()
-                f.seek(0)
-
-                self._storage.set_bytes(
-                    self._get_key(model, version),
-                    f.read(),
-                )
+            self._serder.serialize(model, tmpdir)
+            self._upload_files(model, version, tmpdir)
 
-                self._storage.set_obj(
-                    self._get_key(model, 'latest'),
-                    version,
-                )
+            self._storage.set_obj(
+                self._get_key(model, 'latest'),
+                version,
+            )
 
-                model.version = version
+            model.version = version
         finally:
-            dir_util.remove_tree(tmpdir)
+            shutil.rmtree(tmpdir, ignore_errors=True)
 
         return version
 
-    def load(self, model, version=None):
+    def load(self, model, version=None, shared=False):
         """
         Restore the model from the model repository
 
+        Files of a loaded version are kept in a local cache folder, loading the same
+        version again deserializes them without touching the storage.
+
+        With ``shared=True`` the restored objects are also kept in an in-process cache
+        and handed as they are to the next shared loads of the same version, nothing
+        is deserialized again. These models then share the same objects, which must
+        not be modified, e.g. trained further.
+
         :param model: target model
         :param version: version name, leave blank to load the latest version
+        :param shared: reuse the objects restored by a previous shared load of the version
         """
         # assert isinstance(model, Model)
         if version is None:
             version = self._storage.get_obj(self._get_key(model, 'latest'))
 
-        logger.info('Loading version %s ....' % version)
-
-        try:
-            tmpdir = tempfile.mkdtemp()
-            with tempfile.NamedTemporaryFile(mode="wb") as f:
-                f.write(self._storage.get_bytes(
-                    self._get_key(model, version)
-                ))
-                f.flush()
-                f.seek(0)
-
-                _tar_extract(f.name, tmpdir)
-                self._serder.deserialize(model, tmpdir)
+        cache_key = self._get_cache_key(model, version)
+        if shared:
+            with ModelRepository._CACHE_LOCK:
+                state = ModelRepository._CACHE.get(cache_key)
+                if state is not None:
+                    ModelRepository._CACHE.move_to_end(cache_key)
+
+            if state is not None:
+                logger.info('Loading version %s from memory ....' % version)
+                for attr, value in state.items():
+                    setattr(model, attr, value)
                 model.version = version
-        finally:
-            # We get error from Tensorflow telling that it could not find the folder
-            # Unsuccessful TensorSliceReader constructor: Failed to get matching files on 
-            # /var/folders/wb/40304xlx477cfjzbk386l2gr0000gn/T/tmpwcrvm2e2/model/weights: 
-            # Not found: /var/folders/wb/40304xlx477cfjzbk386l2gr0000gn/T/tmpwcrvm2e2/model; No such file or directory [Op:RestoreV2]
-            #
-            # dir_util.remove_tree(tmpdir)
+                return
 
-            # instead, register the function to clean it up when the interpreter quits
-            import atexit
+        logger.info('Loading version %s ....' % version)
 
-            def clean_tmpdir(tmpdir):
-                # print('Clean up %s'  % tmpdir)
-                dir_util.remove_tree(tmpdir)
+        # the folder is kept around: tensorflow reads the weight files lazily,
+        # and loading the same version again skips the download
+        cache_dir = self._get_cache_dir(model, version)
+        ModelRepository._LOADED_CACHE_DIRS.add(cache_dir)
+        try:
+            # marks the version as recently loaded, see _evict_cache
+            os.utime(os.path.join(cache_dir, self._CACHE_SENTINEL))
+        except FileNotFoundError:
+            self._fetch_to_cache(model, version, cache_dir)
+            self._evict_cache()
 
-            atexit.register(clean_tmpdir, tmpdir=tmpdir)
+        self._serder.deserialize(model, cache_dir)
+        model.version = version
+        if shared:
+            self._cache_put(cache_key, model)
 
     def delete(self, model, version):
         """
         Delete a model from model repository
 
+        File contents stay in the content-addressed store, they may be shared
+        with other versions. Use ``gc`` to remove the ones no version refers to anymore.
+
         :param model: model instance or the model class
         :param version: target version
         """
         # assert isinstance(model, Model) or isinstance(model, type)
         assert version != 'latest'  # magic key
+        self.invalidate(model, version)
         self._storage.delete(self._get_key(model, version))
 
+    def gc(self):
+        """
+        Remove the file contents no model version refers to anymore from the
+        content-addressed store
+
+        Files of a version being persisted are only referred to once its manifest
+        is written, do not run it while models are persisted to the same storage.
+
+        :returns: number of removed files
+        """
+        manifest_suffix = f"{SEP}{self._MANIFEST}"
+        live = set()
+        for key in self._storage.list_keys(self._NAMESPACE):
+            if key.endswith(manifest_suffix):
+                live.update(json.loads(self._storage.get_bytes(key))['files'].values())
+
+        removed = 0
+        for key in list(self._storage.list_keys(self._get_cas_key())):
+            if key.rsplit(SEP, 1)[-1] not in live:
+                self._storage.delete(key)
+                removed += 1
+
+        return removed
+
+    def invalidate(self, model, version):
+        """
+        Drop a model version from the cache of loaded models and downloaded files
+
+        :param model: model instance or the model class
+        :param version: target version
+        """
+        with ModelRepository._CACHE_LOCK:
+            ModelRepository._CACHE.pop(self._get_cache_key(model, version), None)
+
+        cache_dir = self._get_cache_dir(model, version)
+        ModelRepository._LOADED_CACHE_DIRS.discard(cache_dir)
+        if os.path.isdir(cache_dir):
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
     def download(self, model, version, path):
         """
-        Download a model archive to local disk
+        Download the files of a model version to local disk
 
         :param model: model instance or model class
         :param version: version name
-        :param path: target folder to extract the model archive
+        :param path: target folder to download the model files to
         """
-        with tempfile.NamedTemporaryFile(mode="wb") as f:
-            f.write(self._storage.get_bytes(
-                self._get_key(model, version)
-            ))
-            f.flush()
-            f.seek(0)
+        self._fetch(model, version, path)
+        return path
+
+    def _upload_files(self, model, version, path):
+        """
+        Store the files of a serialized model in the content-addressed store and
+        write the version manifest. Files with a known content are not uploaded again:
+        storages never leave partially written files, and loads remove the files which
+        fail their digest check, so that they are uploaded by the next persist.
+        """
+        files = {rel: _file_digest(src) for rel, src in walk_files(path)}
+        sources = {digest: os.path.join(path, *rel.split('/')) for rel, digest in files.items()}
+
+        def upload_blob(digest):
+            key = self._get_blob_key(digest)
+            if not self._storage.exists(key):
+                self._storage.upload_file(key, sources[digest])
+
+        with ThreadPoolExecutor(max_workers=self._TRANSFER_WORKERS) as executor:
+            list(executor.map(upload_blob, sources))
+
+        # written last, a version is only visible once all its files are stored
+        self._storage.set_bytes(
+            self._get_manifest_key(model, version),
+            json.dumps({'files': files}).encode('utf-8'),
+        )
 
+    def _fetch(self, model, version, path):
+        key = self._get_key(model, version)
+        try:
+            manifest = json.loads(self._storage.get_bytes(self._get_manifest_key(model, version)))
+        except KeyError:
+            manifest = None
+
+        if manifest is not None:
+            self._fetch_files(manifest['files'], path)
+            return
+
+        # versions persisted by older releases are stored as a single tar archive
+        with tempfile.NamedTemporaryFile(mode="wb") as f:
+            self._storage.download_file(key, f.name)
             _tar_extract(f.name, path)
 
-        return path
+    def _fetch_files(self, files, path):
+        """
+        Download the files listed in a version manifest from the content-addressed store,
+        verifying the content of every file against its digest
+        """
+        path_real = os.path.realpath(path)
+        targets = {}
+        for rel, digest in files.items():
+            dst = os.path.realpath(os.path.join(path_real, *rel.split('/')))
+            if os.path.commonpath([path_real, dst]) != path_real:
+                raise ValueError('Unsafe path in model manifest: %s' % rel)
+
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            targets.setdefault(digest, []).append(dst)
+
+        def download_blob(digest):
+            dst, *copies = targets[digest]
+            self._storage.download_file(self._get_blob_key(digest), dst)
+            if _file_digest(dst) != digest:
+                # the stored content is unusable, drop it so that the next persist stores it again
+                self._storage.delete(self._get_blob_key(digest))
+                raise ValueError('Corrupted model file %s, content does not match its digest' % dst)
+            for other in copies:
+                shutil.copyfile(dst, other)
+
+        with ThreadPoolExecutor(max_workers=self._TRANSFER_WORKERS) as executor:
+            list(executor.map(download_blob, targets))
+
+    def _fetch_to_cache(self, model, version, cache_dir):
+        if os.path.isdir(cache_dir):
+            # incomplete folder, e.g. written by an older release
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+        os.makedirs(os.path.dirname(cache_dir), exist_ok=True)
+        tmpdir = tempfile.mkdtemp(prefix=os.path.basename(cache_dir) + '.', suffix='.tmp', dir=os.path.dirname(cache_dir))
+        try:
+            self._fetch(model, version, tmpdir)
+            open(os.path.join(tmpdir, self._CACHE_SENTINEL), 'w').close()
+            try:
+                os.replace(tmpdir, cache_dir)
+            except OSError:
+                # another loader completed the same folder in the meantime
+                if not os.path.exists(os.path.join(cache_dir, self._CACHE_SENTINEL)):
+                    raise
+        finally:
+            if os.path.isdir(tmpdir):
+                shutil.rmtree(tmpdir, ignore_errors=True)
+
+    def _evict_cache(self):
+        """
+        Remove the least recently loaded versions from the cache folder, so that at
+        most CACHE_MAX_VERSIONS of them are kept. Folders which may still be in use are
+        kept anyway: the ones loaded by this process, and the ones loaded by any process
+        within CACHE_EVICT_AFTER seconds.
+        """
+        now = time.time()
+        entries = []
+        with os.scandir(CACHE_ROOT) as it:
+            for entry in it:
+                try:
+                    mtime = os.stat(os.path.join(entry.path, self._CACHE_SENTINEL)).st_mtime
+                except OSError:  # not a complete version folder
+                    continue
+                entries.append((mtime, entry.path))
+
+        entries.sort(reverse=True)
+        for mtime, path in entries[CACHE_MAX_VERSIONS:]:
+            if path in ModelRepository._LOADED_CACHE_DIRS or now - mtime < CACHE_EVICT_AFTER:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+
+    def _get_cache_dir(self, model, version):
+        key = self._get_key(model, version)
+        # full storage location, so that repositories on different storages don't collide
+        location = hashlib.sha1(self._storage.location(key).encode('utf-8')).hexdigest()[:12]
+        return os.path.join(CACHE_ROOT, '%s-%s' % (key.replace(SEP, '_'), location))
+
+    def _get_cache_key(self, model, version):
+        model_class = model if isinstance(model, type) else model.__class__
+        # full storage location, so that repositories on different storages don't collide
+        return model_class, self._storage.location(self._get_key(model, version))
+
+    def _cache_put(self, cache_key, model):
+        # references only, copying would read memory-mapped arrays into memory
+        state = {attr: getattr(model, attr) for attr in self._CACHE_ATTRS if hasattr(model, attr)}
+        with ModelRepository._CACHE_LOCK:
+            ModelRepository._CACHE[cache_key] = state
+            ModelRepository._CACHE.move_to_end(cache_key)
+            while len(ModelRepository._CACHE) > self._CACHE_MAX_ENTRIES:
+                ModelRepository._CACHE.popitem(last=False)
 
     # TODO: list all versions
 
+    def _get_manifest_key(self, model, version):
+        return f"{self._get_key(model, version)}{SEP}{self._MANIFEST}"
+
+    def _get_blob_key(self, digest):
+        return f"{self._get_cas_key()}{SEP}{digest}"
+
+    def _get_cas_key(self):
+        key = self._CAS
+
+        if self._NAMESPACE:
+            key = f"{self._NAMESPACE}{SEP}{key}"
+
+        return key
+
     def _get_key(self, model, version):
-        model_class = model if isinstance(model, type) else model.__class__
-        model_name = model_class.__module__ + '.' + model_class.__name__
+        model_name = _class_fqn(model if isinstance(model, type) else model.__class__)
 
         key = f"{model_name}{SEP}{version}"
 
@@ -340,19 +612,132 @@ class ModelRepository:
         return getattr(cls, 'MODEL_REPO')
 
 
-def _tar_create(target, source):
+_COPY_BUFSIZE = 1024 * 1024
+
+
+def _file_digest(path):
+    """
+    SHA-256 hex digest of a file content
+    """
+    with open(path, 'rb') as f:
+        if hasattr(hashlib, 'file_digest'):  # python 3.11+
+            return hashlib.file_digest(f, 'sha256').hexdigest()
+
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: f.read(_COPY_BUFSIZE), b''):
+            digest.update(chunk)
+        return digest.hexdigest()
+
+
+def _copy_fileobj(src, dst, bufsize=_COPY_BUFSIZE):
+    """
+    Copy the content of a file object to another one, reading into a single
+    preallocated buffer instead of allocating a new bytes object per chunk
+    """
+    readinto = getattr(src, 'readinto', None)
+    if readinto is None:
+        shutil.copyfileobj(src, dst, bufsize)
+        return
+
+    buf = bytearray(bufsize)
+    view = memoryview(buf)
+    while True:
+        n = readinto(buf)
+        if not n:
+            break
+        dst.write(view[:n])
+
+
+@functools.lru_cache(maxsize=None)
+def _class_fqn(cls):
     """
-    Helper function to create a tar archive
+    Fully qualified name of a model class, computed once per class
     """
-    with tarfile.open(target, "w:gz") as tf:
-        tf.add(source, arcname='', recursive=True)
+    return f'{cls.__module__}.{cls.__name__}'
 
-    return target
+
+_EXTRACT_WORKERS = 8
+_EXTRACT_MAX_PENDING_SIZE = 64 * 1024 * 1024  # bytes read from the archive but not yet written
+_EXTRACT_INLINE_SIZE = 16 * 1024 * 1024  # larger files are streamed to disk by the reader
 
 
 def _tar_extract(source, target):
     """
     Helper function to extract a tar archive
+
+    Only used for model versions persisted as a single archive by older releases.
     """
+    # tarfile detects gzip and plain archives by itself
     with tarfile.open(source) as tf:
-        tf.extractall(target)
+        _tar_extract_members(tf, target)
+
+
+def _tar_extract_members(tf, target):
+    """
+    Extract the members of an open tar archive
+
+    The archive has to be read sequentially, but writing the files does not: the
+    content of regular files is handed over to a thread pool, so that writes of
+    many small files (e.g. checkpoint shards) overlap with reading the archive.
+    At most _EXTRACT_MAX_PENDING_SIZE bytes wait in memory for being written, files
+    larger than _EXTRACT_INLINE_SIZE are streamed to disk by the reader instead.
+    """
+    target_real = os.path.realpath(target)
+    pending_size = 0
+    pending_changed = threading.Condition()
+
+    def release(size):
+        nonlocal pending_size
+        with pending_changed:
+            pending_size -= size
+            pending_changed.notify()
+
+    def set_attrs(member, path):
+        # mode and modification time of the member, as TarFile.extract does
+        tf.chmod(member, path)
+        tf.utime(member, path)
+
+    def write_file(member, path, data):
+        try:
+            with open(path, 'wb') as f:
+                f.write(data)
+            set_attrs(member, path)
+        finally:
+            release(member.size)
+
+    with ThreadPoolExecutor(max_workers=_EXTRACT_WORKERS) as executor:
+        futures = []
+        directories = []
+        for member in tf:
+            path = os.path.realpath(os.path.join(target_real, member.name))
+            if os.path.commonpath([target_real, path]) != target_real:
+                raise ValueError('Unsafe path in model archive: %s' % member.name)
+
+            if member.isdir():
+                os.makedirs(path, exist_ok=True)
+                directories.append((member, path))
+            elif member.isfile():
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                if member.size > _EXTRACT_INLINE_SIZE:
+                    with open(path, 'wb') as f:
+                        _copy_fileobj(tf.extractfile(member), f)
+                    set_attrs(member, path)
+                else:
+                    with pending_changed:
+                        pending_changed.wait_for(lambda: pending_size + member.size <= _EXTRACT_MAX_PENDING_SIZE)
+                        pending_size += member.size
+                    try:
+                        data = tf.extractfile(member).read()
+                    except BaseException:
+                        release(member.size)
+                        raise
+                    futures.append(executor.submit(write_file, member, path, data))
+            else:
+                tf.extract(member, target_real)
+
+        for future in futures:
+            future.result()
+
+    # after the files, writing them updates the modification time of their folder
+    for member, path in sorted(directories, key=lambda item: item[1], reverse=True):
+        set_attrs(member, path)
@@ -1,4 +1,5 @@
-from typing import Union, Any, NoReturn
+import os
+from typing import Union, Any, NoReturn, Iterator, Tuple
 from abc import ABC, abstractmethod
 
 
@@ -22,6 +23,14 @@ class Storage(ABC):
     def set_bytes(self, name: str, value: bytes) -> NoReturn:
         ...
 
+    @abstractmethod
+    def download_file(self, name: str, path: str) -> NoReturn:
+        ...
+
+    @abstractmethod
+    def upload_file(self, name: str, path: str) -> NoReturn:
+        ...
+
     @abstractmethod
     def exists(self, name: str) -> bool:
         ...
@@ -29,3 +38,32 @@ class Storage(ABC):
     @abstractmethod
     def delete(self, name: str) -> Any:
         ...
+
+    @abstractmethod
+    def location(self, name: str) -> str:
+        ...
+
+    @abstractmethod
+    def list_keys(self, prefix: str = "") -> Iterator[str]:
+        ...
+
+
+def walk_files(path: str, prefix: str = "") -> Iterator[Tuple[str, str]]:
+    """
+    Recursively list the files in a local folder
+
+    :param path: local folder
+    :param prefix: prefix of the returned relative paths
+    :returns: iterator of (relative path using "/" separator, local file path)
+    """
+    # DirEntry caches the file type from the directory listing, no extra stat per entry.
+    # Symlinks are skipped alike for folders and files, serialized models only hold regular files
+    with os.scandir(path) as it:
+        entries = list(it)
+
+    for entry in entries:
+        rel = prefix + entry.name
+        if entry.is_dir(follow_symlinks=False):
+            yield from walk_files(entry.path, rel + "/")
+        elif entry.is_file(follow_symlinks=False):
+            yield rel, entry.path
@@ -1,7 +1,9 @@
 import os
-from typing import Any, NoReturn
+import shutil
+import uuid
+from typing import Any, NoReturn, Iterator
 import cloudpickle
-from h1st.model_repository.storage.base import Storage
+from h1st.model_repository.storage.base import Storage, walk_files
 
 
 class LocalStorage(Storage):
@@ -63,6 +65,40 @@ class LocalStorage(Storage):
         with open(key, "wb") as f:
             return f.write(value)
 
+    def download_file(self, name: str, path: str) -> NoReturn:
+        """
+        Copy object value to a local file
+
+        :param name: object name
+        :param path: local file path
+        """
+        key = self._to_key(name)
+        if not os.path.exists(key):
+            raise KeyError(name)
+
+        shutil.copyfile(key, path)
+
+    def upload_file(self, name: str, path: str) -> NoReturn:
+        """
+        Set a key value to the content of a local file
+
+        The content is copied next to the object first and then renamed, an
+        interrupted copy never leaves a partial object behind.
+
+        :param name: object name
+        :param path: local file path
+        """
+        key = self._to_key(name)
+
+        os.makedirs(os.path.dirname(key), mode=0o777, exist_ok=True)
+        tmp = f"{key}.{uuid.uuid4().hex}.tmp"
+        try:
+            shutil.copyfile(path, tmp)
+            os.replace(tmp, key)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
     def exists(self, name: str) -> bool:
         """
         Return true if object exists in the storage
@@ -76,9 +112,31 @@ class LocalStorage(Storage):
         """
         key = self._to_key(name)
 
-        if os.path.exists(key):
+        if os.path.isdir(key):
+            shutil.rmtree(key)
+        elif os.path.exists(key):
             os.remove(key)
 
+    def location(self, name: str) -> str:
+        """
+        Return the absolute path of an object in the file system
+        """
+        return os.path.abspath(self._to_key(name))
+
+    def list_keys(self, prefix: str = "") -> Iterator[str]:
+        """
+        List the names of the objects stored under a name prefix
+
+        :param prefix: name prefix, leave blank to list every object
+        """
+        path = self._to_key(prefix)
+        if not os.path.isdir(path):
+            return
+
+        prefix = f"{prefix}::" if prefix else ""
+        for rel, _ in walk_files(path):
+            yield prefix + rel.replace("/", "::")
+
     def _to_key(self, key):
         # TODO: make sure it is a safe name
         key = key.replace("..", "__").replace("::", "/")
@@ -1,6 +1,9 @@
-from typing import Any, NoReturn
+from typing import Any, NoReturn, Iterator
+import boto3
+import botocore
 import cloudpickle
 import s3fs
+from boto3.s3.transfer import TransferConfig
 from h1st.model_repository.storage.base import Storage
 
 
@@ -9,6 +12,13 @@ class S3Storage(Storage):
     Provide data storage on top of AWS S3
     """
 
+    # used by upload_file / download_file for concurrent multipart transfers
+    TRANSFER_CONFIG = TransferConfig(
+        multipart_chunksize=16 * 1024 * 1024,
+        max_concurrency=10,
+        use_threads=True,
+    )
+
     def __init__(self, bucket_name: str = "", prefix: str = ""):
         """
         :param bucket_name: s3 bucket name to store data into
@@ -17,6 +27,7 @@ class S3Storage(Storage):
         self.bucket_name = bucket_name
         self.prefix = prefix
         self.fs = s3fs.S3FileSystem()
+        self.s3 = boto3.client('s3')
 
     def get_obj(self, name: str) -> Any:
         """
@@ -24,27 +35,20 @@ class S3Storage(Storage):
 
         :param name: object name
         """
-        key = self._to_key(name)
-        try:
-            with self.fs.open(key, 'rb') as f:
-                return cloudpickle.load(f)
-        except FileNotFoundError as ex:
-            raise KeyError(name) from ex
+        return cloudpickle.loads(self.get_bytes(name))
 
     def get_bytes(self, name) -> bytes:
         """
-        Retrieve object value in bytes
+        Retrieve object value in bytes, with a single GET request
 
         :param name: object name
         """
-        key = self._to_key(name)
+        bucket, key = self._to_bucket_key(name)
         try:
-            with self.fs.open(key, 'rb') as f:
-                return f.read()
-        except FileNotFoundError as ex:
+            return self.s3.get_object(Bucket=bucket, Key=key)['Body'].read()
+        except self.s3.exceptions.NoSuchKey as ex:
             raise KeyError(name) from ex
 
-
     def set_obj(self, name: str, value: Any) -> NoReturn:
         """
         Set key value to a python object
@@ -52,29 +56,58 @@ class S3Storage(Storage):
         :param name: object name
         :param value: value in python object
         """
-        key = self._to_key(name)
-
-        with self.fs.open(key, 'wb') as f:
-            return cloudpickle.dump(value, f)
+        self.set_bytes(name, cloudpickle.dumps(value))
 
     def set_bytes(self, name: str, value: bytes) -> NoReturn:
         """
-        Set a key value to a list of bytes
+        Set a key value to a list of bytes, with a single PUT request
 
         :param name: object name
         :param value: value in bytes
         """
-        key = self._to_key(name)
+        bucket, key = self._to_bucket_key(name)
+        self.s3.put_object(Bucket=bucket, Key=key, Body=value)
+
+    def download_file(self, name: str, path: str) -> NoReturn:
+        """
+        Download object value to a local file, using parallel ranged
+        requests for large objects
 
-        with self.fs.open(key, 'wb') as f:
-            f.write(value)
+        :param name: object name
+        :param path: local file path
+        """
+        bucket, key = self._to_bucket_key(name)
+        try:
+            self.s3.download_file(bucket, key, path, Config=self.TRANSFER_CONFIG)
+        except botocore.exceptions.ClientError as ex:
+            if ex.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey'):
+                raise KeyError(name) from ex
+            raise
+
+    def upload_file(self, name: str, path: str) -> NoReturn:
+        """
+        Set a key value to the content of a local file, using parallel
+        multipart upload for large files
+
+        :param name: object name
+        :param path: local file path
+        """
+        bucket, key = self._to_bucket_key(name)
+        self.s3.upload_file(path, bucket, key, Config=self.TRANSFER_CONFIG)
 
     def exists(self, name: str) -> bool:
         """
-        Return true if object exists in the storage
+        Return true if object exists in the storage, with a single HEAD request
         """
-        key = self._to_key(name)
-        return self.fs.exists(key)
+        bucket, key = self._to_bucket_key(name)
+        try:
+            self.s3.head_object(Bucket=bucket, Key=key)
+        except botocore.exceptions.ClientError as ex:
+            if ex.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey'):
+                return False
+            raise
+
+        return True
 
     def delete(self, name: str) -> NoReturn:
         """
@@ -82,10 +115,30 @@ class S3Storage(Storage):
         """
         try:
             key = self._to_key(name)
-            self.fs.rm(key)
+            self.fs.rm(key, recursive=True)
         except FileNotFoundError:
             pass
 
+    def location(self, name: str) -> str:
+        """
+        Return the s3 url of an object
+        """
+        return f"s3://{self._to_key(name)}"
+
+    def list_keys(self, prefix: str = "") -> Iterator[str]:
+        """
+        List the names of the objects stored under a name prefix
+
+        :param prefix: name prefix, leave blank to list every object
+        """
+        prefix = f"{prefix}::" if prefix else ""
+        bucket, root = self._to_bucket_key(prefix)
+
+        paginator = self.s3.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=bucket, Prefix=root):
+            for item in page.get('Contents', []):
+                yield prefix + item['Key'][len(root):].replace("/", "::")
+
     def _to_key(self, key):
         """
         Convert a key to s3 object key with bucket and prefix
@@ -96,3 +149,9 @@ class S3Storage(Storage):
             key = f"{self.prefix}/{key}"
 
         return f"{self.bucket_name}/{key}"
+
+    def _to_bucket_key(self, key):
+        """
+        Convert a key to a (bucket, s3 object key) pair
+        """
+        return self._to_key(key).split("/", 1)
@@ -1,6 +1,6 @@
 from unittest import TestCase
+import shutil
 import tempfile
-from distutils import dir_util
 import pathlib
 import subprocess
 
@@ -17,7 +17,7 @@ class CliTestCase(TestCase):
             self.assertTrue(p.exists())
             self.assertTrue((p / 'graph.py').exists())
         finally:
-            dir_util.remove_tree(tempdir)
+            shutil.rmtree(tempdir, ignore_errors=True)
 
     def test_cli_smoketest(self):
         """
@@ -2,8 +2,8 @@ from unittest import TestCase
 import sys
 import os
 import pathlib
+import shutil
 import tempfile
-from distutils import dir_util
 from h1st.core.context import init, discover_h1st_project
 
 
@@ -40,6 +40,6 @@ class TestContext(TestCase):
             self.assertEqual(str(p), discover_h1st_project(model_dir)[1])
             self.assertEqual(str(p), discover_h1st_project(nb_dir)[1])
         finally:
-            dir_util.remove_tree(tmp_name)
+            shutil.rmtree(tmp_name, ignore_errors=True)
             os.chdir(cwd)
             sys.path = syspath
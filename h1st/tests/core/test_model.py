@@ -1,7 +1,9 @@
 from unittest import TestCase, skip
 from h1st import Model
 from h1st.model_repository import ModelRepository, ModelSerDe
+from h1st.model_repository import model_repository
 from h1st.model_repository.storage.local import LocalStorage
+import shutil
 import tempfile
 import sklearn
 from sklearn.datasets import load_iris
@@ -40,9 +42,9 @@ class ModelSerDeTestCase(TestCase):
             import os
             # print(os.listdir(path))
 
-            import yaml
-            with open('%s/METAINFO.yaml' % path, 'r') as file:
-                meta_info = yaml.load(file, Loader=yaml.Loader)
+            import json
+            with open('%s/METAINFO.json' % path, 'r') as file:
+                meta_info = json.load(file)
                 assert type(meta_info) == dict
                 if collection == 'list':
                     assert meta_info['models'][0]['model_path'] == model_path
@@ -71,6 +73,8 @@ class ModelSerDeTestCase(TestCase):
                 assert model_type == model_serde._get_model_type(model_2.model)
                 assert model_2.model.predict(X).shape[0] == y.shape[0]
 
+        return model_2
+
     def test_serialize_sklearn_model(self):
         class MyModel(Model):
             def __init__(self):
@@ -117,6 +121,35 @@ class ModelSerDeTestCase(TestCase):
 
         self.assert_models(MyModel, 'sklearn', 'model_Iris.joblib', 'dict')
 
+    def test_serialize_tuple_sklearn_model(self):
+        class MyModel(Model):
+            def __init__(self):
+                super().__init__()
+
+            def train(self, prepared_data):
+                X, y = prepared_data['X'], prepared_data['y']
+                self.model = (LogisticRegression(random_state=0).fit(X, y), LogisticRegression(random_state=0).fit(X, y))
+
+        # restored as a list
+        model_2 = self.assert_models(MyModel, 'sklearn', 'model_0.joblib', 'list')
+        assert type(model_2.model) == list
+        assert len(model_2.model) == 2
+
+    def test_serialize_ordered_dict_sklearn_model(self):
+        from collections import OrderedDict
+
+        class MyModel(Model):
+            def __init__(self):
+                super().__init__()
+
+            def train(self, prepared_data):
+                X, y = prepared_data['X'], prepared_data['y']
+                self.model = OrderedDict([('Iris', LogisticRegression(random_state=0).fit(X, y))])
+
+        # restored as a dict
+        model_2 = self.assert_models(MyModel, 'sklearn', 'model_Iris.joblib', 'dict')
+        assert type(model_2.model) == dict
+
     def test_serialize_tensorflow_model(self):
         class MyModel(Model):
             def __init__(self):
@@ -175,6 +208,16 @@ class ModelSerDeTestCase(TestCase):
         self.assert_models(MyModel, 'tensorflow-keras', 'model_Iris', 'dict')
 
 class ModelRepositoryTestCase(TestCase):
+    def setUp(self):
+        # keep downloaded versions out of the user's cache folder
+        self.cache_root = model_repository.CACHE_ROOT
+        self.cache_dir = tempfile.mkdtemp()
+        model_repository.CACHE_ROOT = self.cache_dir
+
+    def tearDown(self):
+        model_repository.CACHE_ROOT = self.cache_root
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
     def test_serialize_sklearn_model(self):
         class MyModel(Model):
             def __init__(self):
@@ -200,6 +243,295 @@ class ModelRepositoryTestCase(TestCase):
 
             assert 'sklearn' in str(type(model_2.model))
 
+    def test_persist_unchanged_files_once(self):
+        class MyModel(Model):
+            def __init__(self):
+                super().__init__()
+                self.model = LogisticRegression(random_state=0)
+
+            def train(self, prepared_data):
+                X, y = prepared_data['X'], prepared_data['y']
+                self.model.fit(X, y)
+
+        X, y = load_iris(return_X_y=True)
+        prepared_data = {'X': X, 'y': y}
+
+        model = MyModel()
+        model.train(prepared_data)
+        with tempfile.TemporaryDirectory() as path:
+            import os
+            mm = ModelRepository(storage=LocalStorage(storage_path=path))
+            version = mm.persist(model=model)
+            blobs = os.listdir('%s/_models/cas' % path)
+
+            # same content, no new file in the content-addressed store
+            version_2 = mm.persist(model=model)
+            assert version_2 != version
+            assert sorted(os.listdir('%s/_models/cas' % path)) == sorted(blobs)
+
+            model_2 = MyModel()
+            mm.load(model=model_2, version=version_2)
+            assert model_2.model.predict(X).shape[0] == y.shape[0]
+
+    def test_gc_unreferenced_files(self):
+        class MyModel(Model):
+            def __init__(self):
+                super().__init__()
+                self.model = LogisticRegression(random_state=0)
+
+            def train(self, prepared_data):
+                X, y = prepared_data['X'], prepared_data['y']
+                self.model.fit(X, y)
+
+        X, y = load_iris(return_X_y=True)
+        prepared_data = {'X': X, 'y': y}
+
+        model = MyModel()
+        model.train(prepared_data)
+        with tempfile.TemporaryDirectory() as path:
+            import os
+            import json
+            mm = ModelRepository(storage=LocalStorage(storage_path=path))
+            version = mm.persist(model=model)
+
+            model.model = LogisticRegression(C=0.5, random_state=0)
+            model.train(prepared_data)
+            version_2 = mm.persist(model=model)
+            blobs = os.listdir('%s/_models/cas' % path)
+
+            # nothing to remove while every file is referred to
+            assert mm.gc() == 0
+
+            mm.delete(model, version)
+            assert mm.gc() > 0
+
+            manifest = json.loads(mm._storage.get_bytes(mm._get_manifest_key(model, version_2)))
+            assert sorted(os.listdir('%s/_models/cas' % path)) == sorted(set(manifest['files'].values()))
+            assert len(os.listdir('%s/_models/cas' % path)) < len(blobs)
+
+            model_2 = MyModel()
+            mm.load(model=model_2, version=version_2)
+            assert model_2.model.predict(X).shape[0] == y.shape[0]
+
+    def test_load_legacy_archive(self):
+        class MyModel(Model):
+            def __init__(self):
+                super().__init__()
+                self.model = LogisticRegression(random_state=0)
+
+            def train(self, prepared_data):
+                X, y = prepared_data['X'], prepared_data['y']
+                self.model.fit(X, y)
+
+        X, y = load_iris(return_X_y=True)
+        prepared_data = {'X': X, 'y': y}
+
+        model = MyModel()
+        model.train(prepared_data)
+        with tempfile.TemporaryDirectory() as path:
+            import os
+            import json
+            import tarfile
+            import yaml
+            mm = ModelRepository(storage=LocalStorage(storage_path=path))
+
+            # layout written by older releases: a gzip tar archive with a YAML METAINFO file
+            with tempfile.TemporaryDirectory() as model_path:
+                ModelSerDe().serialize(model, model_path)
+                with open('%s/METAINFO.json' % model_path, 'r') as file:
+                    meta_info = json.load(file)
+                with open('%s/METAINFO.yaml' % model_path, 'w') as file:
+                    yaml.dump(meta_info, file)
+                os.remove('%s/METAINFO.json' % model_path)
+
+                archive = mm._storage.location(mm._get_key(model, 'old'))
+                os.makedirs(os.path.dirname(archive), exist_ok=True)
+                with tarfile.open(archive, "w:gz") as tf:
+                    tf.add(model_path, arcname='', recursive=True)
+            mm._storage.set_obj(mm._get_key(model, 'latest'), 'old')
+
+            model_2 = MyModel()
+            mm.load(model=model_2)
+            assert model_2.version == 'old'
+            assert (model_2.model.predict(X) == model.model.predict(X)).all()
+
+            with tempfile.TemporaryDirectory() as download_path:
+                mm.download(model, 'old', download_path)
+                assert os.path.exists('%s/METAINFO.yaml' % download_path)
+                assert os.path.exists('%s/model.joblib' % download_path)
+
+    def test_extract_legacy_archive(self):
+        import os
+        import tarfile
+        from h1st.model_repository.model_repository import _tar_extract
+
+        inline_size = model_repository._EXTRACT_INLINE_SIZE
+        model_repository._EXTRACT_INLINE_SIZE = 1024
+        try:
+            with tempfile.TemporaryDirectory() as path:
+                os.makedirs('%s/source/variables' % path)
+                files = {
+                    'variables/small.data': os.urandom(100),
+                    'variables/large.data': os.urandom(10 * 1024),  # streamed by the reader
+                    'model.index': os.urandom(1024),
+                }
+                for name, data in files.items():
+                    with open('%s/source/%s' % (path, name), 'wb') as f:
+                        f.write(data)
+                os.chmod('%s/source/variables/large.data' % path, 0o600)
+                os.utime('%s/source/variables/large.data' % path, (1000, 1000))
+
+                with tarfile.open('%s/model.tar.gz' % path, "w:gz") as tf:
+                    tf.add('%s/source' % path, arcname='', recursive=True)
+                _tar_extract('%s/model.tar.gz' % path, '%s/target' % path)
+
+                for name, data in files.items():
+                    with open('%s/target/%s' % (path, name), 'rb') as f:
+                        assert f.read() == data
+                stat = os.stat('%s/target/variables/large.data' % path)
+                assert stat.st_mode & 0o777 == 0o600
+                assert stat.st_mtime == 1000
+        finally:
+            model_repository._EXTRACT_INLINE_SIZE = inline_size
+
+    def test_load_corrupted_file(self):
+        class MyModel(Model):
+            def __init__(self):
+                super().__init__()
+                self.model = LogisticRegression(random_state=0)
+
+            def train(self, prepared_data):
+                X, y = prepared_data['X'], prepared_data['y']
+                self.model.fit(X, y)
+
+        X, y = load_iris(return_X_y=True)
+        prepared_data = {'X': X, 'y': y}
+
+        model = MyModel()
+        model.train(prepared_data)
+        with tempfile.TemporaryDirectory() as path:
+            import os
+            mm = ModelRepository(storage=LocalStorage(storage_path=path))
+            version = mm.persist(model=model)
+
+            for blob in os.listdir('%s/_models/cas' % path):
+                with open('%s/_models/cas/%s' % (path, blob), 'ab') as f:
+                    f.write(b'garbage')
+
+            with self.assertRaises(ValueError):
+                mm.load(model=MyModel(), version=version)
+
+            # corrupted files are dropped from the store, persisting the model again repairs them
+            version_2 = mm.persist(model=model)
+            model_2 = MyModel()
+            mm.load(model=model_2, version=version_2)
+            assert model_2.model.predict(X).shape[0] == y.shape[0]
+
+    def test_load_unsafe_manifest(self):
+        class MyModel(Model):
+            pass
+
+        with tempfile.TemporaryDirectory() as path:
+            import json
+            mm = ModelRepository(storage=LocalStorage(storage_path=path))
+            mm._storage.set_bytes(
+                mm._get_manifest_key(MyModel, 'v1'),
+                json.dumps({'files': {'../escaped': '0' * 64}}).encode('utf-8'),
+            )
+
+            with self.assertRaises(ValueError):
+                mm.load(model=MyModel(), version='v1')
+
+    def test_load_cached_model(self):
+        class MyModel(Model):
+            def __init__(self):
+                super().__init__()
+                self.model = LogisticRegression(random_state=0)
+
+            def train(self, prepared_data):
+                X, y = prepared_data['X'], prepared_data['y']
+                self.model.fit(X, y)
+
+        X, y = load_iris(return_X_y=True)
+        prepared_data = {'X': X, 'y': y}
+
+        model = MyModel()
+        model.train(prepared_data)
+        with tempfile.TemporaryDirectory() as path:
+            mm = ModelRepository(storage=LocalStorage(storage_path=path))
+            version = mm.persist(model=model)
+
+            model_2 = MyModel()
+            mm.load(model=model_2, version=version)
+
+            import os
+            import shutil
+            cache_dir = mm._get_cache_dir(model, version)
+            assert os.path.exists(os.path.join(cache_dir, mm._CACHE_SENTINEL))
+
+            # remove the stored files behind the repository's back, next load must be served from the cache folder
+            mm._storage.delete(mm._get_key(model, version))
+            assert not mm._storage.exists(mm._get_manifest_key(model, version))
+
+            model_3 = MyModel()
+            mm.load(model=model_3, version=version, shared=True)
+            assert model_3.version == version
+            assert model_3.model is not model_2.model
+            assert model_3.model.predict(X).shape[0] == y.shape[0]
+
+            # without the cache folder, a shared load is served from memory
+            shutil.rmtree(cache_dir)
+            model_4 = MyModel()
+            mm.load(model=model_4, version=version, shared=True)
+            assert model_4.version == version
+            assert model_4.model is model_3.model
+
+            mm.delete(model, version)
+            with self.assertRaises(KeyError):
+                mm.load(model=MyModel(), version=version, shared=True)
+
+    def test_evict_cached_versions(self):
+        class MyModel(Model):
+            def __init__(self):
+                super().__init__()
+                self.model = LogisticRegression(random_state=0)
+
+            def train(self, prepared_data):
+                X, y = prepared_data['X'], prepared_data['y']
+                self.model.fit(X, y)
+
+        X, y = load_iris(return_X_y=True)
+        prepared_data = {'X': X, 'y': y}
+
+        model = MyModel()
+        model.train(prepared_data)
+        max_versions = model_repository.CACHE_MAX_VERSIONS
+        model_repository.CACHE_MAX_VERSIONS = 1
+        try:
+            with tempfile.TemporaryDirectory() as path:
+                import os
+                mm = ModelRepository(storage=LocalStorage(storage_path=path))
+                versions = [mm.persist(model=model) for _ in range(4)]
+                cache_dirs = [mm._get_cache_dir(model, version) for version in versions]
+
+                # folders left by other processes, version 0 was loaded long ago and version 1 recently
+                mm.load(model=MyModel(), version=versions[0])
+                mm.load(model=MyModel(), version=versions[1])
+                ModelRepository._LOADED_CACHE_DIRS.difference_update(cache_dirs[:2])
+                os.utime(os.path.join(cache_dirs[0], mm._CACHE_SENTINEL), (0, 0))
+
+                # loaded long ago by this process, its files may still be read
+                mm.load(model=MyModel(), version=versions[2])
+                os.utime(os.path.join(cache_dirs[2], mm._CACHE_SENTINEL), (0, 0))
+
+                mm.load(model=MyModel(), version=versions[3])
+                assert not os.path.exists(cache_dirs[0])
+                assert os.path.exists(cache_dirs[1])
+                assert os.path.exists(cache_dirs[2])
+                assert os.path.exists(cache_dirs[3])
+        finally:
+            model_repository.CACHE_MAX_VERSIONS = max_versions
+
 
 class ModelStatsSerDeTestCase(TestCase):
     def test_serialize_dict(self):
@@ -223,9 +555,9 @@ class ModelStatsSerDeTestCase(TestCase):
             import os
             # print(os.listdir(path))
 
-            import yaml
-            with open('%s/METAINFO.yaml' % path, 'r') as file:
-                meta_info = yaml.load(file, Loader=yaml.Loader)
+            import json
+            with open('%s/METAINFO.json' % path, 'r') as file:
+                meta_info = json.load(file)
                 print(meta_info)
                 assert type(meta_info) == dict
                 assert meta_info['stats'] == 'stats.joblib'
@@ -236,3 +568,33 @@ class ModelStatsSerDeTestCase(TestCase):
 
                 model_serde.deserialize(model_2, path)
                 assert 'CarSpeed' in model_2.stats
+
+    def test_deserialize_legacy_metainfo(self):
+        class MyModel(Model):
+            def __init__(self):
+                super().__init__()
+
+            def train(self, reload_data=False):
+                self.stats = {'CarSpeed': {'min': 0.01}}
+
+        model = MyModel()
+        model.train()
+
+        model_2 = MyModel()
+
+        model_serde = ModelSerDe()
+        with tempfile.TemporaryDirectory() as path:
+            model_serde.serialize(model, path)
+
+            # archives persisted by older releases carry a YAML METAINFO file
+            import os
+            import json
+            import yaml
+            with open('%s/METAINFO.json' % path, 'r') as file:
+                meta_info = json.load(file)
+            with open('%s/METAINFO.yaml' % path, 'w') as file:
+                yaml.dump(meta_info, file)
+            os.remove('%s/METAINFO.json' % path)
+
+            model_serde.deserialize(model_2, path)
+            assert 'CarSpeed' in model_2.stats
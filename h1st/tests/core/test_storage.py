@@ -0,0 +1,90 @@
+from unittest import TestCase
+import tempfile
+import boto3
+from botocore.stub import Stubber
+from h1st.model_repository.storage.s3 import S3Storage
+
+
+class S3StorageTestCase(TestCase):
+    def create_storage(self, prefix=''):
+        storage = S3Storage('bucket', prefix)
+        storage.s3 = boto3.client(
+            's3',
+            region_name='us-east-1',
+            aws_access_key_id='key',
+            aws_secret_access_key='secret',
+        )
+        stubber = Stubber(storage.s3)
+        stubber.activate()
+        self.addCleanup(stubber.deactivate)
+        return storage, stubber
+
+    def test_list_keys(self):
+        storage, stubber = self.create_storage('models')
+        stubber.add_response(
+            'list_objects_v2',
+            {'Contents': [{'Key': 'models/_models/cas/abc'}], 'IsTruncated': True, 'NextContinuationToken': 'next'},
+            {'Bucket': 'bucket', 'Prefix': 'models/_models/cas/'},
+        )
+        stubber.add_response(
+            'list_objects_v2',
+            {'Contents': [{'Key': 'models/_models/cas/def'}], 'IsTruncated': False},
+            {'Bucket': 'bucket', 'Prefix': 'models/_models/cas/', 'ContinuationToken': 'next'},
+        )
+
+        assert list(storage.list_keys('_models::cas')) == ['_models::cas::abc', '_models::cas::def']
+        stubber.assert_no_pending_responses()
+
+    def test_list_keys_without_prefix(self):
+        storage, stubber = self.create_storage()
+        stubber.add_response(
+            'list_objects_v2',
+            {'Contents': [{'Key': '_models/cas/abc'}, {'Key': 'my.Model/v1/MANIFEST.json'}], 'IsTruncated': False},
+            {'Bucket': 'bucket', 'Prefix': ''},
+        )
+        stubber.add_response(
+            'list_objects_v2',
+            {'IsTruncated': False},
+            {'Bucket': 'bucket', 'Prefix': '_models/'},
+        )
+
+        assert list(storage.list_keys()) == ['_models::cas::abc', 'my.Model::v1::MANIFEST.json']
+        assert list(storage.list_keys('_models')) == []
+        stubber.assert_no_pending_responses()
+
+    def test_get_bytes_missing_key(self):
+        storage, stubber = self.create_storage('models')
+        stubber.add_client_error(
+            'get_object',
+            service_error_code='NoSuchKey',
+            http_status_code=404,
+            expected_params={'Bucket': 'bucket', 'Key': 'models/my.Model/latest'},
+        )
+
+        with self.assertRaises(KeyError):
+            storage.get_bytes('my.Model::latest')
+        stubber.assert_no_pending_responses()
+
+    def test_download_file_missing_key(self):
+        storage, stubber = self.create_storage('models')
+        # the transfer manager looks the object up first, its parameters depend on the s3transfer version
+        stubber.add_client_error('head_object', service_error_code='404', http_status_code=404)
+
+        with tempfile.NamedTemporaryFile() as f:
+            with self.assertRaises(KeyError):
+                storage.download_file('my.Model::v1', f.name)
+        stubber.assert_no_pending_responses()
+
+    def test_exists(self):
+        storage, stubber = self.create_storage('models')
+        stubber.add_response('head_object', {}, {'Bucket': 'bucket', 'Key': 'models/_models/cas/abc'})
+        stubber.add_client_error(
+            'head_object',
+            service_error_code='404',
+            http_status_code=404,
+            expected_params={'Bucket': 'bucket', 'Key': 'models/_models/cas/def'},
+        )
+
+        assert storage.exists('_models::cas::abc')
+        assert not storage.exists('_models::cas::def')
+        stubber.assert_no_pending_responses()